@@ -2,37 +2,160 @@
 API client functions for OpenAI, Claude, and Mistral.
 Handles structured outputs, retries, and error handling.
 """
+import os
+import json
 import time
-import threading
+import hashlib
+import asyncio
 import logging
 import anthropic
-import requests
-from openai import OpenAI, OpenAIError
+from openai import AsyncOpenAI, OpenAIError
+import httpx
 from mistralai import Mistral
+from mistralai.models import SDKError, HTTPValidationError
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential, before_sleep_log
 
 from config import (
     OPENAI_API_KEYS, ANTHROPIC_API_KEY, MISTRAL_API_KEY,
     OPENAI_MODELS_MAIN, CLAUDE_MODELS, MISTRAL_MODELS,
     CONFIG
 )
-from prompts import SYSTEM_PROMPT
+from prompts import INSTRUCTIONS_PROMPT
 from utils import get_response_schema, get_claude_response_schema, get_mistral_response_schema
+from llm_cache import cached_llm
 
 logger = logging.getLogger(__name__)
 
-# Global OpenAI client state
-openai_client = OpenAI(api_key=OPENAI_API_KEYS[0])
-current_key_index = 0
-openai_key_lock = threading.Lock()  # Lock for thread-safe key switching
+# One OpenAI client per API key. Requests rotate round-robin over the keys that are
+# not cooling down, so every key's rate limit is used in parallel instead of one key
+# at a time. All state is touched from the event loop only, so no lock is needed.
+openai_clients = [AsyncOpenAI(api_key=key) for key in OPENAI_API_KEYS if key]
+openai_key_state = [{'cooldown_until': 0.0, 'exhausted': False} for _ in openai_clients]
+_openai_next_key = 0
 
+# Shared Claude/Mistral clients so connection pools are reused across calls
+claude_client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=0)  # Retries are handled by tenacity
+mistral_client = Mistral(api_key=MISTRAL_API_KEY)
 
-def switch_openai_key():
-    """Switch to the next available OpenAI API key (thread-safe)."""
-    global current_key_index, openai_client
-    with openai_key_lock:
-        current_key_index = (current_key_index + 1) % len(OPENAI_API_KEYS)
-        openai_client = OpenAI(api_key=OPENAI_API_KEYS[current_key_index])
-        logger.info(f"Switched to OpenAI API key {current_key_index + 1}")
+# Schemas and response formats are static, so build them once and share them across calls.
+# They are passed straight to the SDKs and must not be mutated.
+_OPENAI_SCHEMA = get_response_schema()
+_CLAUDE_SCHEMA = get_claude_response_schema()  # Without minItems/maxItems for arrays
+_MISTRAL_SCHEMA = get_mistral_response_schema()
+
+_OPENAI_RF_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "evaluation_response",
+        "strict": True,
+        "schema": _OPENAI_SCHEMA
+    }
+}
+_OPENAI_RF_JSON_OBJ = {"type": "json_object"}
+_CLAUDE_OUTPUT_FORMAT = {
+    "type": "json_schema",
+    "schema": _CLAUDE_SCHEMA
+}
+_MISTRAL_RF_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "evaluation_response",
+        "strict": True,
+        "schema": _MISTRAL_SCHEMA
+    }
+}
+
+
+def is_quota_error(e: Exception) -> bool:
+    """Check whether an OpenAI error means an API key is out of quota."""
+    error_str = str(e).lower()
+    return "insufficient_quota" in error_str or "billing_hard_limit_reached" in error_str
+
+
+def pick_openai_key() -> int:
+    """Return the next ready OpenAI key in rotation, or the one whose cooldown ends soonest."""
+    global _openai_next_key
+    available = [i for i, state in enumerate(openai_key_state) if not state['exhausted']]
+    if not available:
+        raise Exception("All OpenAI API keys exhausted!")
+    now = time.monotonic()
+    for offset in range(len(openai_key_state)):
+        i = (_openai_next_key + offset) % len(openai_key_state)
+        if i in available and openai_key_state[i]['cooldown_until'] <= now:
+            _openai_next_key = i + 1
+            return i
+    return min(available, key=lambda i: openai_key_state[i]['cooldown_until'])
+
+
+def mark_openai_key_error(key_index: int, e: OpenAIError):
+    """Record a quota or rate-limit error against an OpenAI key."""
+    state = openai_key_state[key_index]
+    if is_quota_error(e):
+        state['exhausted'] = True
+        logger.warning("API key %s exhausted", key_index + 1)
+    elif getattr(e, 'status_code', None) == 429:
+        state['cooldown_until'] = time.monotonic() + CONFIG['retry_delay']
+        logger.warning("API key %s rate limited, cooling down for %ss", key_index + 1, CONFIG['retry_delay'])
+
+
+def should_retry_openai(e: BaseException) -> bool:
+    """Retry predicate for OpenAI calls; quota errors retry only while another key is left."""
+    if all(state['exhausted'] for state in openai_key_state):
+        logger.error("All OpenAI API keys exhausted!")
+        return False
+    if isinstance(e, OpenAIError):
+        if is_quota_error(e):
+            return True
+        status_code = getattr(e, 'status_code', None)
+        if status_code is not None and status_code < 500 and status_code != 429:
+            logger.error("Non-retryable OpenAI error: %s", e)
+            return False
+        return True
+    return isinstance(e, Exception)
+
+
+def should_retry_claude(e: BaseException) -> bool:
+    """Retry predicate for Claude calls; 429, 5xx and connection errors are retried."""
+    if isinstance(e, anthropic.APIStatusError):
+        if e.status_code == 429 or e.status_code >= 500:
+            return True
+        logger.error("Non-retryable Claude error: %s", e)
+        return False
+    return isinstance(e, Exception)
+
+
+def should_retry_mistral(e: BaseException) -> bool:
+    """Retry predicate for Mistral calls; only 429 and 5xx HTTP errors are retried."""
+    if isinstance(e, HTTPValidationError):
+        # 422 request validation failures are raised separately from SDKError
+        logger.error("Non-retryable Mistral validation error: %s", e)
+        return False
+    if isinstance(e, SDKError):
+        status_code = getattr(e, 'status_code', None)
+    elif isinstance(e, httpx.HTTPStatusError):
+        status_code = e.response.status_code
+    else:
+        # Network errors and other unexpected failures are worth another attempt
+        return isinstance(e, Exception)
+    if status_code == 429 or (status_code is not None and status_code >= 500):
+        return True
+    logger.error("Non-retryable Mistral HTTP error %s: %s", status_code, e)
+    return False
+
+
+def api_retry(predicate):
+    """Retry an async API call with jittered exponential backoff."""
+    return retry(
+        retry=retry_if_exception(predicate),
+        wait=wait_random_exponential(
+            multiplier=CONFIG['retry_delay'],
+            exp_base=CONFIG['exponential_backoff_base'],
+            max=CONFIG['exponential_backoff_max']
+        ),
+        stop=stop_after_attempt(CONFIG['max_retries']),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True
+    )
 
 
 def get_json_structure_instruction():
@@ -60,121 +183,227 @@ Remember:
 """
 
 
-def get_openai_score(prompt: str, model: str) -> str:
-    """Get score from OpenAI API."""
-    global current_key_index, openai_client
-    
-    response_schema = get_response_schema()
+# Models that support strict json_schema response formats
+_OPENAI_SCHEMA_MODELS = {"gpt-4o", "gpt-4o-mini", "gpt-4.1", "gpt-4.1-mini", "gpt-5.1", "o1", "o3-mini", "o4-mini"}
+# Models that take the developer role and max_completion_tokens instead of max_tokens
+_OPENAI_NEW_TOKEN_PARAM_MODELS = {"gpt-5.1", "o1", "o3-mini", "o4-mini"}
+# Reasoning models sent without an output token limit
+_OPENAI_UNCAPPED_MODELS = {"o1", "o3-mini", "o4-mini"}
+
+
+def openai_call_profile(model: str) -> dict:
+    """Work out the per-model settings used to build OpenAI requests."""
+    if model in _OPENAI_NEW_TOKEN_PARAM_MODELS:
+        return {
+            "role": "developer",
+            "instructions": INSTRUCTIONS_PROMPT,
+            "tok_kw": None if model in _OPENAI_UNCAPPED_MODELS else "max_completion_tokens",
+            "temperature": None,
+            "response_format": _OPENAI_RF_SCHEMA
+        }
+    use_schema = model in _OPENAI_SCHEMA_MODELS
+    # Static instructions (and JSON format instructions) stay ahead of the resume so the
+    # prefix is identical across calls and eligible for automatic prompt caching
+    return {
+        "role": "system",
+        "instructions": INSTRUCTIONS_PROMPT if use_schema else INSTRUCTIONS_PROMPT + get_json_structure_instruction(),
+        "tok_kw": "max_tokens",
+        "temperature": 0,
+        "response_format": _OPENAI_RF_SCHEMA if use_schema else _OPENAI_RF_JSON_OBJ
+    }
+
+
+# Precomputed call profiles for the configured models; others are worked out on demand
+_OPENAI_PROFILE = {model: openai_call_profile(model) for model in OPENAI_MODELS_MAIN}
+
+
+def get_openai_profile(model: str) -> dict:
+    """Return the call profile for a model, precomputed when available."""
+    return _OPENAI_PROFILE.get(model) or openai_call_profile(model)
+
+
+def build_openai_request(prompt: str, model: str, max_tokens: int) -> dict:
+    """Build chat.completions.create kwargs for an OpenAI model.
     
+    ``max_tokens`` is ignored for o-series models, which are sent without a limit.
+    """
+    profile = get_openai_profile(model)
+    create_kwargs = {
+        "model": model,
+        "messages": [
+            {"role": profile["role"], "content": profile["instructions"]},
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": profile["response_format"]
+    }
+    if profile["temperature"] is not None:
+        create_kwargs["temperature"] = profile["temperature"]
+    if profile["tok_kw"]:
+        create_kwargs[profile["tok_kw"]] = max_tokens
+    return create_kwargs
+
+
+@cached_llm
+@api_retry(should_retry_openai)
+async def get_openai_score(prompt: str, model: str) -> str:
+    """Get score from OpenAI API."""
+    key_index = pick_openai_key()
     try:
-        schema_support_models = ["gpt-4o", "gpt-4o-mini", "gpt-4.1", "gpt-4.1-mini", "gpt-5.1", "o1", "o3-mini", "o4-mini"]
-        use_schema = model in schema_support_models
-        
-        # Models that require max_completion_tokens instead of max_tokens
-        new_token_param_models = ["gpt-5.1", "o1", "o3-mini", "o4-mini"]
-        
-        if model in ['o1', 'o3-mini', 'o4-mini']:
-            messages = [
-                {"role": "developer", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ]
-            create_kwargs = {
-                "model": model,
-                "messages": messages,
-                "response_format": {
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "evaluation_response",
-                        "strict": True,
-                        "schema": response_schema
-                    }
-                }
-            }
-            response = openai_client.chat.completions.create(**create_kwargs)
-        elif model == "gpt-5.1":
-            # gpt-5.1 uses developer role and max_completion_tokens
-            messages = [
-                {"role": "developer", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ]
-            create_kwargs = {
-                "model": model,
-                "messages": messages,
-                "max_completion_tokens": 4096,
-                "response_format": {
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "evaluation_response",
-                        "strict": True,
-                        "schema": response_schema
-                    }
-                }
-            }
-            response = openai_client.chat.completions.create(**create_kwargs)
-        else:
-            messages = [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ]
-            create_kwargs = {
-                "model": model,
-                "messages": messages,
-                "temperature": 0,
-                "max_tokens": 4096
-            }
-            
-            if use_schema:
-                create_kwargs["response_format"] = {
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "evaluation_response",
-                        "strict": True,
-                        "schema": response_schema
-                    }
-                }
-            else:
-                json_instruction = get_json_structure_instruction()
-                create_kwargs["response_format"] = {"type": "json_object"}
-                messages[-1]["content"] = messages[-1]["content"] + json_instruction
-            
-            response = openai_client.chat.completions.create(**create_kwargs)
+        for max_tokens in (CONFIG['max_output_tokens'], CONFIG['max_output_tokens_retry']):
+            create_kwargs = build_openai_request(prompt, model, max_tokens)
+            response = await openai_clients[key_index].chat.completions.create(**create_kwargs)
+            if response.choices[0].finish_reason != "length":
+                break
+            if get_openai_profile(model)["tok_kw"] is None:
+                # Sent without a token limit, so a second identical request can't do better
+                logger.warning("OpenAI response truncated for uncapped model %s", model)
+                break
+            logger.warning("OpenAI response truncated at %s tokens for model %s", max_tokens, model)
         
         result = response.choices[0].message.content
-        logger.debug(f"OpenAI API call successful for model {model}")
+        logger.debug("OpenAI API call successful for model %s", model)
         return result
         
     except OpenAIError as e:
-        error_str = str(e).lower()
-        if "insufficient_quota" in error_str or "billing_hard_limit_reached" in error_str:
-            with openai_key_lock:
-                key_index = current_key_index
-            if key_index < len(OPENAI_API_KEYS) - 1:
-                logger.warning(f"API key {key_index + 1} exhausted, switching to next key...")
-                switch_openai_key()
-                return get_openai_score(prompt, model)
-            else:
-                logger.error("All OpenAI API keys exhausted!")
-                raise
-        logger.error(f"OpenAI API error for model {model}: {e}")
+        mark_openai_key_error(key_index, e)
+        logger.error("OpenAI API error for model %s: %s", model, e)
         raise
 
 
-def get_claude_score(prompt: str, model: str) -> str:
-    """Get score from Claude API."""
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+@api_retry(should_retry_openai)
+async def _retrieve_openai_batch(openai_client: AsyncOpenAI, batch_id: str):
+    """Fetch a batch's current state, retrying transient errors."""
+    return await openai_client.batches.retrieve(batch_id)
+
+
+@api_retry(should_retry_openai)
+async def _download_openai_file(openai_client: AsyncOpenAI, file_id: str):
+    """Download a batch output file, retrying transient errors."""
+    return await openai_client.files.content(file_id)
+
+
+def _batch_state_path(model: str) -> str:
+    """Where the id of a model's in-flight batch is kept between runs."""
+    return os.path.join(os.getenv('OUTPUT_DIR', '.'), f'openai_batch_{model}.json')
+
+
+def _load_batch_state(model: str, fingerprint: str):
+    """Return the saved (key_index, batch_id) for this exact payload, or None."""
+    try:
+        with open(_batch_state_path(model), encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get('fingerprint') != fingerprint or not 0 <= state.get('key_index', -1) < len(openai_clients):
+        return None
+    return state['key_index'], state['batch_id']
+
+
+def _save_batch_state(model: str, fingerprint: str, key_index: int, batch_id: str):
+    """Persist a submitted batch so a restarted run polls it instead of paying again."""
+    path = _batch_state_path(model)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'fingerprint': fingerprint, 'key_index': key_index, 'batch_id': batch_id}, f)
+    os.replace(tmp_path, path)
+
+
+async def submit_openai_batch(batch_requests: list, model: str) -> dict:
+    """Run prompts for one OpenAI model through the Batch API.
+    
+    ``batch_requests`` is a list of ``(custom_id, prompt)`` tuples. Returns a dict mapping
+    each custom_id to the response content; requests that failed inside the batch
+    are omitted. The batch id is saved under OUTPUT_DIR until its results are
+    downloaded, so a restart with the same requests resumes the running batch.
+    """
+    lines = []
+    for custom_id, prompt in batch_requests:
+        lines.append(json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            # Truncated batch lines can't be re-tried cheaply, so use the larger ceiling up front
+            "body": build_openai_request(prompt, model, CONFIG['max_output_tokens_retry'])
+        }))
+    payload = ("\n".join(lines) + "\n").encode('utf-8')
+    fingerprint = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    # Files and batches belong to the key that created them, so one client is used throughout
+    batch = None
+    saved = _load_batch_state(model, fingerprint)
+    if saved is not None:
+        key_index, batch_id = saved
+        openai_client = openai_clients[key_index]
+        batch = await _retrieve_openai_batch(openai_client, batch_id)
+        if batch.status in ("failed", "expired", "cancelled") and not batch.output_file_id:
+            logger.warning("Saved OpenAI batch %s for model %s ended with status %s, resubmitting", batch_id, model, batch.status)
+            batch = None
+        else:
+            logger.info("Resuming OpenAI batch %s for model %s (status: %s)", batch.id, model, batch.status)
+    
+    if batch is None:
+        key_index = pick_openai_key()
+        openai_client = openai_clients[key_index]
+        batch_file = await openai_client.files.create(file=(f"batch_{model}.jsonl", payload), purpose="batch")
+        batch = await openai_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        _save_batch_state(model, fingerprint, key_index, batch.id)
+        logger.info("Submitted OpenAI batch %s for model %s with %s requests", batch.id, model, len(batch_requests))
+    
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        await asyncio.sleep(CONFIG['batch_poll_interval'])
+        batch = await _retrieve_openai_batch(openai_client, batch.id)
+        logger.info("OpenAI batch %s (%s) status: %s", batch.id, model, batch.status)
+    
+    if batch.status != "completed" and not batch.output_file_id:
+        raise Exception(f"OpenAI batch {batch.id} for model {model} ended with status {batch.status}")
+    
+    results = {}
+    if batch.output_file_id:
+        content = await _download_openai_file(openai_client, batch.output_file_id)
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if item.get("error") or response.get("status_code") != 200:
+                logger.error("Batch request %s failed for model %s: %s", item.get('custom_id'), model, item.get('error') or response.get('body'))
+                continue
+            results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    
+    try:
+        os.remove(_batch_state_path(model))
+    except FileNotFoundError:
+        pass
     
+    logger.info("OpenAI batch %s (%s) returned %s/%s results", batch.id, model, len(results), len(batch_requests))
+    return results
+
+
+@cached_llm
+@api_retry(should_retry_claude)
+async def get_claude_score(prompt: str, model: str) -> str:
+    """Get score from Claude API."""
     structured_output_models = [
         "claude-opus-4-1-20250805"     # Claude Opus 4.1 (supports structured outputs)
     ]
     
     use_structured_output = model in structured_output_models
     
+    # For older Claude 3.x models: use GPT-3.5 style JSON instruction approach. The JSON format
+    # instructions join the static system block rather than the user turn so the whole
+    # prefix is covered by the cache_control breakpoint.
+    instructions = INSTRUCTIONS_PROMPT if use_structured_output else INSTRUCTIONS_PROMPT + get_json_structure_instruction()
+    system = [{"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}}]
+    
     try:
         create_kwargs = {
             "model": model,
             "temperature": 0.0,
-            "max_tokens": 8192,
-            "system": SYSTEM_PROMPT,
+            "system": system,
             "messages": [
                 {
                     "role": "user",
@@ -185,213 +414,62 @@ def get_claude_score(prompt: str, model: str) -> str:
         
         if use_structured_output:
             # Use Claude-compatible schema (without minItems/maxItems for arrays)
-            claude_schema = get_claude_response_schema()
-            response = client.beta.messages.create(
-                betas=["structured-outputs-2025-11-13"],
-                model=model,
-                temperature=0.0,
-                max_tokens=8192,
-                system=SYSTEM_PROMPT,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt,
-                    },
-                ],
-                output_format={
-                    "type": "json_schema",
-                    "schema": claude_schema
-                }
-            )
-            result = response.content[0].text
-            logger.debug(f"Claude structured output API call successful for model {model}")
-            return result
+            create_kwargs["betas"] = ["structured-outputs-2025-11-13"]
+            create_kwargs["output_format"] = _CLAUDE_OUTPUT_FORMAT
+            create = claude_client.beta.messages.create
         else:
-            # For older Claude 3.x models: use GPT-3.5 style JSON instruction approach
-            # Add JSON format instructions to prompt (same approach as GPT-3.5)
             # The parser will extract structured data from the JSON response
-            json_instruction = get_json_structure_instruction()
-            create_kwargs["messages"][0]["content"] = create_kwargs["messages"][0]["content"] + json_instruction
-            response = client.messages.create(**create_kwargs)
-            result = response.content[0].text
-            logger.debug(f"Claude API call successful for model {model} (using GPT-3.5 style JSON instruction fallback)")
-            return result
+            create = claude_client.messages.create
+        
+        for max_tokens in (CONFIG['max_output_tokens'], CONFIG['max_output_tokens_retry']):
+            response = await create(max_tokens=max_tokens, **create_kwargs)
+            if response.stop_reason != "max_tokens":
+                break
+            logger.warning("Claude response truncated at %s tokens for model %s", max_tokens, model)
+        
+        result = response.content[0].text
+        if use_structured_output:
+            logger.debug("Claude structured output API call successful for model %s", model)
+        else:
+            logger.debug("Claude API call successful for model %s (using GPT-3.5 style JSON instruction fallback)", model)
+        return result
     except anthropic.InternalServerError as e:
-        error_msg = str(e).lower()
-        if 'overloaded' in error_msg:
-            logger.warning(f"Claude server overloaded for model {model}")
-            raise anthropic.InternalServerError("Server overloaded") from e
+        if 'overloaded' in str(e).lower():
+            logger.warning("Claude server overloaded for model %s", model)
         else:
-            logger.error(f"Claude internal server error for model {model}: {e}")
-            raise
+            logger.error("Claude internal server error for model %s: %s", model, e)
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error in Claude API call for model {model}: {e}")
+        logger.error("Unexpected error in Claude API call for model %s: %s", model, e)
         raise
 
 
-def get_mistral_score(prompt: str, model: str) -> str:
+@cached_llm
+@api_retry(should_retry_mistral)
+async def get_mistral_score(prompt: str, model: str) -> str:
     """Get score from Mistral API."""
-    client = Mistral(api_key=MISTRAL_API_KEY)
-    mistral_schema = get_mistral_response_schema()
-    
     try:
-        full_prompt = SYSTEM_PROMPT + "\n\n" + prompt
+        full_prompt = INSTRUCTIONS_PROMPT + "\n\n" + prompt
         
-        response = client.chat.complete(
-            model=model,
-            temperature=0.0,
-            max_tokens=4096,
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "evaluation_response",
-                    "strict": True,
-                    "schema": mistral_schema
-                }
-            },
-            messages=[
-                {
-                    "role": "user",
-                    "content": full_prompt,
-                },
-            ]
-        )
+        for max_tokens in (CONFIG['max_output_tokens'], CONFIG['max_output_tokens_retry']):
+            response = await mistral_client.chat.complete_async(
+                model=model,
+                temperature=0.0,
+                max_tokens=max_tokens,
+                response_format=_MISTRAL_RF_SCHEMA,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": full_prompt,
+                    },
+                ]
+            )
+            if response.choices[0].finish_reason != "length":
+                break
+            logger.warning("Mistral response truncated at %s tokens for model %s", max_tokens, model)
         result = response.choices[0].message.content
-        logger.debug(f"Mistral structured output API call successful for model {model}")
+        logger.debug("Mistral structured output API call successful for model %s", model)
         return result
     except Exception as e:
-        logger.error(f"Mistral structured output failed for {model}: {e}")
+        logger.error("Mistral structured output failed for %s: %s", model, e)
         raise
-
-
-def retry_request(prompt: str, model: str, max_retries: int, retry_delay: int) -> str:
-    """Retry OpenAI API request with exponential backoff."""
-    for attempt in range(max_retries):
-        try:
-            return get_openai_score(prompt, model)
-        except OpenAIError as e:
-            error_str = str(e).lower()
-            
-            if hasattr(e, 'http_status') and e.http_status == 429:
-                wait_time = min(
-                    retry_delay * (CONFIG['exponential_backoff_base'] ** attempt),
-                    CONFIG['exponential_backoff_max']
-                )
-                logger.warning(f"OpenAI rate limit hit (attempt {attempt + 1}/{max_retries}), waiting {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-            elif "insufficient_quota" in error_str or "billing_hard_limit_reached" in error_str:
-                with openai_key_lock:
-                    key_index = current_key_index
-                if key_index < len(OPENAI_API_KEYS) - 1:
-                    switch_openai_key()
-                    logger.info(f"Switched to backup API key, retrying...")
-                    continue
-                else:
-                    logger.error("All OpenAI API keys exhausted!")
-                    raise
-            else:
-                logger.error(f"Non-retryable OpenAI error: {e}")
-                raise
-        
-        except Exception as e:
-            logger.error(f"Unexpected error in OpenAI retry (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt == max_retries - 1:
-                raise
-            wait_time = min(
-                retry_delay * (CONFIG['exponential_backoff_base'] ** attempt),
-                CONFIG['exponential_backoff_max']
-            )
-            time.sleep(wait_time)
-    
-    raise Exception(f"Max retries ({max_retries}) exceeded for OpenAI model {model}")
-
-
-def retry_request_claude(prompt: str, model: str, max_retries: int, retry_delay: int) -> str:
-    """Retry Claude API request with exponential backoff."""
-    for attempt in range(max_retries):
-        try:
-            return get_claude_score(prompt, model)
-        except anthropic.RateLimitError as e:
-            # 429 rate limit error - always retry with backoff
-            wait_time = min(
-                retry_delay * (CONFIG['exponential_backoff_base'] ** attempt),
-                CONFIG['exponential_backoff_max']
-            )
-            logger.warning(f"Claude rate limit 429 (attempt {attempt + 1}/{max_retries}), waiting {wait_time}s...")
-            time.sleep(wait_time)
-            continue
-        except anthropic.InternalServerError as e:
-            error_str = str(e).lower()
-            if 'rate_limit' in error_str or 'overloaded' in error_str:
-                # Exponential backoff with jitter
-                wait_time = min(
-                    retry_delay * (CONFIG['exponential_backoff_base'] ** attempt),
-                    CONFIG['exponential_backoff_max']
-                )
-                logger.warning(f"Claude rate limit/overload (attempt {attempt + 1}/{max_retries}), waiting {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-            logger.error(f"Non-retryable Claude error: {e}")
-            raise
-        except Exception as e:
-            error_str = str(e).lower()
-            # Check if it's a rate limit error in disguise
-            if '429' in str(e) or 'rate_limit' in error_str:
-                wait_time = min(
-                    retry_delay * (CONFIG['exponential_backoff_base'] ** attempt),
-                    CONFIG['exponential_backoff_max']
-                )
-                logger.warning(f"Claude rate limit (attempt {attempt + 1}/{max_retries}), waiting {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-            logger.error(f"Unexpected error in Claude retry (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt == max_retries - 1:
-                raise
-            wait_time = min(
-                retry_delay * (CONFIG['exponential_backoff_base'] ** attempt),
-                CONFIG['exponential_backoff_max']
-            )
-            time.sleep(wait_time)
-    
-    raise Exception(f"Max retries ({max_retries}) exceeded for Claude model {model}")
-
-
-def retry_request_mistral(prompt: str, model: str, max_retries: int, retry_delay: int) -> str:
-    """Retry Mistral API request with exponential backoff."""
-    for attempt in range(max_retries):
-        try:
-            return get_mistral_score(prompt, model)
-        except requests.exceptions.HTTPError as e:
-            if e.response and e.response.status_code in [429, 500, 502, 503, 504]:
-                wait_time = min(
-                    retry_delay * (CONFIG['exponential_backoff_base'] ** attempt),
-                    CONFIG['exponential_backoff_max']
-                )
-                logger.warning(f"Mistral HTTP error {e.response.status_code} (attempt {attempt + 1}/{max_retries}), waiting {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-            logger.error(f"Non-retryable Mistral HTTP error: {e}")
-            raise
-        except Exception as e:
-            error_str = str(e).lower()
-            # Check for rate limit errors (429, rate_limit, too many requests)
-            if '429' in str(e) or 'rate_limit' in error_str or 'too many requests' in error_str or 'rate limit' in error_str:
-                wait_time = min(
-                    retry_delay * (CONFIG['exponential_backoff_base'] ** attempt),
-                    CONFIG['exponential_backoff_max']
-                )
-                logger.warning(f"Mistral rate limit (attempt {attempt + 1}/{max_retries}), waiting {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-            logger.error(f"Unexpected error in Mistral retry (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt == max_retries - 1:
-                raise
-            wait_time = min(
-                retry_delay * (CONFIG['exponential_backoff_base'] ** attempt),
-                CONFIG['exponential_backoff_max']
-            )
-            time.sleep(wait_time)
-    
-    raise Exception(f"Max retries ({max_retries}) exceeded for Mistral model {model}")
-
@@ -7,12 +7,22 @@ load_dotenv()
 CONFIG = {
     'iterations_per_file': 100,
     'batch_size': 15,
-    'max_workers': 5,
+    'provider_concurrency': {  # Max in-flight API requests per provider
+        'openai': 50,
+        'anthropic': 20,
+        'mistral': 20
+    },
     'num_questions': 17,
     'retry_delay': 60,
     'max_retries': 10,
     'exponential_backoff_base': 2,
-    'exponential_backoff_max': 300
+    'exponential_backoff_max': 300,
+    'batch_poll_interval': 60,  # Seconds between OpenAI Batch API status checks
+    'dedupe_deterministic': False,  # Make one call per prompt for DETERMINISTIC_MODELS and replay it to every iteration
+    'write_flush_rows': 64,  # Buffered CSV rows per file before the writer thread flushes
+    'write_flush_interval': 1,  # Max seconds a buffered row waits before being flushed
+    'max_output_tokens': 1024,  # Output ceiling per call; the schema-bounded answer fits well under this
+    'max_output_tokens_retry': 4096  # Ceiling for the one re-try of a call that hit max_output_tokens
 }
 
 QUESTION_RANGES = {
@@ -43,6 +53,10 @@ CLAUDE_MODELS = [
     "claude-sonnet-4-20250514",        # Mapped from claude-3-sonnet (uses GPT-3.5 style JSON instructions - Sonnet 4, not 4.5)
     "claude-3-5-haiku-20241022"        # Mapped from claude-3-haiku (uses GPT-3.5 style JSON instructions)
 ]
+# Models called with temperature=0 and no sampled reasoning. Reasoning models (gpt-5.1,
+# o-series) are excluded because their thought paths vary between calls.
+DETERMINISTIC_MODELS = {"gpt-4.1", "gpt-4o", "gpt-4.1-mini"} | set(CLAUDE_MODELS) | set(MISTRAL_MODELS)
+
 OPENAI_API_KEYS = [
     os.getenv("OPENAI_API_KEY"),
     os.getenv("OPENAI_BACKUP_KEY")
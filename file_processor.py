@@ -1,89 +1,289 @@
 """File processing for resume evaluation."""
 import os
 import csv
+import json
 import time
-import threading
+import queue
+import asyncio
 import logging
-import concurrent.futures
 
-from config import CONFIG, OPENAI_MODELS_MAIN, MISTRAL_MODELS, CLAUDE_MODELS
-from parsers import parse_scores, validate_scores, parse_manipulation_check, parse_thought_process
-from utils import process_txt_files_and_attach_to_prompt
-from api_clients import retry_request, retry_request_claude, retry_request_mistral
+from config import CONFIG, OPENAI_MODELS_MAIN, MISTRAL_MODELS, CLAUDE_MODELS, DETERMINISTIC_MODELS
+from parsers import parse_response, validate_scores
+from api_clients import get_openai_score, get_claude_score, get_mistral_score, submit_openai_batch
 
 logger = logging.getLogger(__name__)
 
-csv_write_lock = threading.Lock()
+# (csv_path, row) pairs consumed by drain_writes; None tells the writer to stop
+result_queue = queue.Queue()
 
+# Queued as (TASK_DONE, record) to append record to the done log once earlier rows are written
+TASK_DONE = object()
 
-def process_file(file_name: str, model: str, directory: str, output_directory: str, global_prompt_template: str):
-    """Process a file with a model, running multiple iterations."""
+# Set by drain_writes if the writer thread dies, so producers can stop instead of queueing forever
+writer_errors = []
+
+FIELDNAMES = ['Model', 'Iteration'] + [f'Q{i}' for i in range(1, CONFIG['num_questions'] + 1)] + ['ManipulationCheck', 'ThoughtProcess']
+
+
+def build_result(model: str, iteration: int, scores: str) -> dict:
+    """Parse and validate a raw model response into a CSV result row.
+    
+    Raises ValueError if the response does not contain valid scores.
+    """
+    parsed = parse_response(scores)
+    validated_scores = validate_scores(parsed['scores'])
+    
+    result = {'Model': model, 'Iteration': iteration}
+    for i, score in enumerate(validated_scores, start=1):
+        result[f'Q{i}'] = score
+    
+    result['ManipulationCheck'] = parsed['manipulation_check']
+    result['ThoughtProcess'] = parsed['thought_process']
+    return result
+
+
+def check_writer():
+    """Raise if the background writer thread has failed."""
+    if writer_errors:
+        raise RuntimeError("Result writer thread failed; rows are no longer being written") from writer_errors[0]
+
+
+def results_csv_path(file_name: str, output_directory: str) -> str:
+    """Return the CSV that holds a file's results."""
+    return os.path.join(output_directory, file_name.replace('.txt', '') + '_results.csv')
+
+
+def load_written_iterations(csv_path: str) -> dict:
+    """Read which iterations each model already has in a results CSV.
+    
+    Returns a dict mapping model name to a set of iteration numbers. Rows cut
+    short by a crash are ignored, so those iterations run again.
+    """
+    written = {}
+    if not os.path.exists(csv_path):
+        return written
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row.get(FIELDNAMES[-1]) is None:
+                continue
+            try:
+                written.setdefault(row['Model'], set()).add(int(row['Iteration']))
+            except (KeyError, TypeError, ValueError):
+                continue
+    return written
+
+
+def write_results(file_name: str, output_directory: str, results: list):
+    """Queue result rows for a file's CSV, sorted by iteration."""
+    check_writer()
+    sorted_results = sorted(results, key=lambda x: x['Iteration'])
+    csv_path = results_csv_path(file_name, output_directory)
+    
+    for result in sorted_results:
+        result_queue.put((csv_path, result))
+    
+    logger.info("Queued %s results for %s", len(sorted_results), csv_path)
+
+
+def mark_task_done(file_name: str, model: str):
+    """Record a finished (file, model) task in the done log, after its queued rows."""
+    check_writer()
+    result_queue.put((TASK_DONE, {'file': file_name, 'model': model}))
+
+
+def load_done(done_path: str) -> set:
+    """Read the (file, model) pairs already recorded in the done log."""
+    if not os.path.exists(done_path):
+        return set()
+    done = set()
+    with open(done_path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                done.add((record['file'], record['model']))
+            except (ValueError, KeyError, TypeError):
+                # A crash mid-append can leave a torn last line; that task just re-runs
+                logger.warning("Ignoring unreadable line in %s: %r", done_path, line[:200])
+    return done
+
+
+def drain_writes(result_q: queue.Queue, done_path: str):
+    """Write queued result rows to their CSVs until a None sentinel arrives.
+    
+    Runs on a single background thread so workers never block on disk I/O.
+    Rows are buffered per file and flushed every ``write_flush_rows`` rows
+    or ``write_flush_interval`` seconds. Before a done record is appended to
+    ``done_path``, every pending row is flushed and the CSVs are fsynced, so a
+    task is never marked done before its results are on disk. Any failure is
+    logged and recorded in ``writer_errors`` for ``check_writer``.
+    """
+    try:
+        _drain_writes(result_q, done_path)
+    except Exception as e:
+        writer_errors.append(e)
+        logger.error("Result writer failed: %s", e, exc_info=True)
+
+
+def _drain_writes(result_q: queue.Queue, done_path: str):
+    outputs = {}  # csv_path -> (file handle, csv.DictWriter, pending rows)
+    unsynced = set()
+    done_file = None
+    last_flush = time.monotonic()
+
+    def flush(csv_path):
+        csvfile, writer, pending = outputs[csv_path]
+        if pending:
+            writer.writerows(pending)
+            pending.clear()
+            csvfile.flush()
+            unsynced.add(csv_path)
+
+    try:
+        while True:
+            try:
+                item = result_q.get(timeout=CONFIG['write_flush_interval'])
+            except queue.Empty:
+                item = ()
+            
+            if item is None:
+                break
+            
+            if item and item[0] is TASK_DONE:
+                for csv_path in outputs:
+                    flush(csv_path)
+                for csv_path in unsynced:
+                    os.fsync(outputs[csv_path][0].fileno())
+                unsynced.clear()
+                if done_file is None:
+                    done_file = open(done_path, 'a', encoding='utf-8')
+                done_file.write(json.dumps(item[1]) + '\n')
+                done_file.flush()
+                os.fsync(done_file.fileno())
+            elif item:
+                csv_path, row = item
+                if csv_path not in outputs:
+                    file_exists = os.path.exists(csv_path)
+                    torn = False
+                    if file_exists and os.path.getsize(csv_path):
+                        with open(csv_path, 'rb') as f:
+                            f.seek(-1, os.SEEK_END)
+                            torn = f.read(1) != b'\n'
+                    csvfile = open(csv_path, 'a', newline='', encoding='utf-8')
+                    writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+                    if not file_exists:
+                        writer.writeheader()
+                    elif torn:
+                        # End a row cut short by a crash so new rows don't run into it
+                        csvfile.write('\r\n')
+                    outputs[csv_path] = (csvfile, writer, [])
+                outputs[csv_path][2].append(row)
+                if len(outputs[csv_path][2]) >= CONFIG['write_flush_rows']:
+                    flush(csv_path)
+            
+            if time.monotonic() - last_flush >= CONFIG['write_flush_interval']:
+                for csv_path in outputs:
+                    flush(csv_path)
+                last_flush = time.monotonic()
+        
+        for csv_path in outputs:
+            flush(csv_path)
+    finally:
+        for csvfile, _, _ in outputs.values():
+            csvfile.close()
+        if done_file is not None:
+            done_file.close()
+
+
+async def process_file(file_name: str, model: str, prompt: str, output_directory: str, semaphore: asyncio.Semaphore, done_iterations=frozenset()) -> int:
+    """Process a file's prepared prompt with a model, running multiple iterations.
+
+    Each API call acquires ``semaphore``, which caps in-flight requests per provider.
+    Iterations in ``done_iterations`` already have rows from an earlier run and are
+    skipped. Returns the number of iterations that now have a result row.
+    """
     start_time = time.time()
     
-    file_path = os.path.join(directory, file_name)
-    prompt = process_txt_files_and_attach_to_prompt(file_path, global_prompt_template)
     results = []
 
     batch_size = CONFIG['batch_size']
     delay_between_batches = 0
-    max_retries = CONFIG['max_retries']
-    retry_delay = CONFIG['retry_delay']
     iterations_per_file = CONFIG['iterations_per_file']
 
-    completed_iterations = set()
+    if model in OPENAI_MODELS_MAIN:
+        request_fn = get_openai_score
+    elif model in MISTRAL_MODELS:
+        request_fn = get_mistral_score
+    elif model in CLAUDE_MODELS:
+        request_fn = get_claude_score
+    else:
+        raise ValueError(f"Unknown model {model}")
+
+    async def run_iteration():
+        async with semaphore:
+            return await request_fn(prompt, model)
+
+    written_iterations = set(done_iterations) & set(range(iterations_per_file))
+    completed_iterations = set(written_iterations)
     
-    logger.info(f"Starting processing: file={file_name}, model={model}, iterations={iterations_per_file}")
+    logger.info(
+        "Starting processing: file=%s, model=%s, iterations=%s (%s already written)",
+        file_name, model, iterations_per_file, len(written_iterations)
+    )
+    
+    if CONFIG['dedupe_deterministic'] and model in DETERMINISTIC_MODELS and len(completed_iterations) < iterations_per_file:
+        # Every iteration sends the same prompt, so one response stands in for all of them.
+        # If that call fails, fall through to the normal per-iteration loop.
+        try:
+            scores = await run_iteration()
+            if scores is None:
+                logger.warning("Null response for deduplicated call, model %s", model)
+            else:
+                missing = sorted(set(range(iterations_per_file)) - completed_iterations)
+                results = [build_result(model, iteration, scores) for iteration in missing]
+                completed_iterations = set(range(iterations_per_file))
+                logger.info("Deduplicated %s in %s: 1 API call, %s duplicate iterations skipped", model, file_name, len(missing) - 1)
+        except ValueError as ve:
+            logger.error("Validation error for deduplicated call, model %s: %s", model, ve)
+        except Exception as e:
+            logger.error("Error in deduplicated call, model %s: %s", model, e, exc_info=True)
     
     while len(completed_iterations) < iterations_per_file:
+        check_writer()
         missing_iterations = set(range(iterations_per_file)) - completed_iterations
         current_iterations = sorted(list(missing_iterations))[:batch_size]
         
-        logger.info(f"Processing file: {file_name}, Model: {model}, Iterations: {current_iterations}")
+        logger.info("Processing file: %s, Model: %s, Iterations: %s", file_name, model, current_iterations)
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=CONFIG['max_workers']) as executor:
-            futures = []
-            for iteration in current_iterations:
-                if model in OPENAI_MODELS_MAIN:
-                    futures.append((iteration, executor.submit(retry_request, prompt, model, max_retries, retry_delay)))
-                elif model in MISTRAL_MODELS:
-                    futures.append((iteration, executor.submit(retry_request_mistral, prompt, model, max_retries, retry_delay)))
-                elif model in CLAUDE_MODELS:
-                    futures.append((iteration, executor.submit(retry_request_claude, prompt, model, max_retries, retry_delay)))
-
-            for iteration, future in futures:
-                try:
-                    scores = future.result()
-                    if scores is None:
-                        logger.warning(f"Null response for iteration {iteration}, model {model}")
-                        completed_iterations.add(iteration)
-                        continue
-                    
-                    try:
-                        score_list = parse_scores(scores)
-                        validated_scores = validate_scores(score_list)
-                        
-                        manipulation_check = parse_manipulation_check(scores)
-                        thought_process = parse_thought_process(scores)
-                        
-                        result = {'Model': model, 'Iteration': iteration}
-                        for i, score in enumerate(validated_scores, start=1):
-                            result[f'Q{i}'] = score
-                        
-                        result['ManipulationCheck'] = manipulation_check
-                        result['ThoughtProcess'] = thought_process
-                        
-                        results.append(result)
-                        completed_iterations.add(iteration)
-                        logger.info(f"Successfully processed iteration {iteration} for {model}")
-                        
-                    except ValueError as ve:
-                        logger.error(f"Validation error for iteration {iteration}, model {model}: {ve}")
-                        logger.debug(f"Raw response: {scores[:200]}...")
-                        completed_iterations.add(iteration)
-                        
-                except Exception as e:
-                    logger.error(f"Error in iteration {iteration}, model {model}: {e}", exc_info=True)
-                    completed_iterations.add(iteration)
+        responses = await asyncio.gather(
+            *(run_iteration() for _ in current_iterations),
+            return_exceptions=True
+        )
+
+        for iteration, scores in zip(current_iterations, responses):
+            if isinstance(scores, Exception):
+                logger.error("Error in iteration %s, model %s: %s", iteration, model, scores, exc_info=scores)
+                completed_iterations.add(iteration)
+                continue
+            
+            if scores is None:
+                logger.warning("Null response for iteration %s, model %s", iteration, model)
+                completed_iterations.add(iteration)
+                continue
+            
+            try:
+                results.append(build_result(model, iteration, scores))
+                completed_iterations.add(iteration)
+                logger.info("Successfully processed iteration %s for %s", iteration, model)
+                
+            except ValueError as ve:
+                logger.error("Validation error for iteration %s, model %s: %s", iteration, model, ve)
+                logger.debug("Raw response: %s...", scores[:200])
+                completed_iterations.add(iteration)
+            except Exception as e:
+                logger.error("Error in iteration %s, model %s: %s", iteration, model, e, exc_info=True)
+                completed_iterations.add(iteration)
         
         elapsed_time = time.time() - start_time
         elapsed_hours = int(elapsed_time // 3600)
@@ -91,29 +291,70 @@ def process_file(file_name: str, model: str, directory: str, output_directory: s
         elapsed_seconds = int(elapsed_time % 60)
         
         logger.info(
-            f"Progress for {model} in {file_name}: "
-            f"{len(completed_iterations)}/{iterations_per_file} iterations completed "
-            f"(Elapsed: {elapsed_hours:02d}:{elapsed_minutes:02d}:{elapsed_seconds:02d})"
+            "Progress for %s in %s: %s/%s iterations completed (Elapsed: %02d:%02d:%02d)",
+            model, file_name, len(completed_iterations), iterations_per_file,
+            elapsed_hours, elapsed_minutes, elapsed_seconds
         )
-        time.sleep(delay_between_batches)
+        await asyncio.sleep(delay_between_batches)
 
-    sorted_results = sorted(results, key=lambda x: x['Iteration'])
-    csv_path = os.path.join(output_directory, file_name.replace('.txt', '') + '_results.csv')
+    write_results(file_name, output_directory, results)
     
-    with csv_write_lock:
-        file_exists = os.path.exists(csv_path)
-        
-        with open(csv_path, 'a', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Model', 'Iteration'] + [f'Q{i}' for i in range(1, CONFIG['num_questions'] + 1)] + ['ManipulationCheck', 'ThoughtProcess']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            if not file_exists:
-                writer.writeheader()
-            
-            for result in sorted_results:
-                writer.writerow(result)
+    total_time = time.time() - start_time
+    hours = int(total_time // 3600)
+    minutes = int((total_time % 3600) // 60)
+    seconds = int(total_time % 60)
+    
+    logger.info(
+        "Completed all %s iterations for %s in %s. Total processing time: %02d:%02d:%02d",
+        iterations_per_file, model, file_name, hours, minutes, seconds
+    )
+    return len(written_iterations) + len(results)
+
+
+
+async def process_openai_batch(prompts: dict, model: str, output_directory: str, done_iterations=None) -> dict:
+    """Process every file with an OpenAI model through a single Batch API job.
+    
+    ``prompts`` maps each file name to its prepared prompt, and ``done_iterations``
+    maps file names to iterations that already have rows from an earlier run; only
+    the missing iterations are submitted. Returns a dict mapping each file name to
+    the number of iterations that now have a result row.
+    """
+    start_time = time.time()
+    iterations_per_file = CONFIG['iterations_per_file']
+    done_iterations = done_iterations or {}
+    
+    missing = {}
+    batch_requests = []
+    for file_name, prompt in prompts.items():
+        missing[file_name] = sorted(set(range(iterations_per_file)) - set(done_iterations.get(file_name, ())))
+        for iteration in missing[file_name]:
+            batch_requests.append((f"{file_name}|{iteration}", prompt))
+    
+    logger.info(
+        "Starting batch processing: model=%s, files=%s, iterations=%s, requests=%s",
+        model, len(prompts), iterations_per_file, len(batch_requests)
+    )
+    responses = await submit_openai_batch(batch_requests, model) if batch_requests else {}
+    
+    row_counts = {}
+    for file_name in prompts:
+        results = []
+        for iteration in missing[file_name]:
+            scores = responses.get(f"{file_name}|{iteration}")
+            if scores is None:
+                logger.warning("No batch response for iteration %s, model %s, file %s", iteration, model, file_name)
+                continue
+            try:
+                results.append(build_result(model, iteration, scores))
+            except ValueError as ve:
+                logger.error("Validation error for iteration %s, model %s: %s", iteration, model, ve)
+                logger.debug("Raw response: %s...", scores[:200])
+            except Exception as e:
+                logger.error("Error in iteration %s, model %s: %s", iteration, model, e, exc_info=True)
         
-        logger.info(f"Wrote {len(sorted_results)} results to {csv_path}")
+        write_results(file_name, output_directory, results)
+        row_counts[file_name] = iterations_per_file - len(missing[file_name]) + len(results)
     
     total_time = time.time() - start_time
     hours = int(total_time // 3600)
@@ -121,7 +362,7 @@ def process_file(file_name: str, model: str, directory: str, output_directory: s
     seconds = int(total_time % 60)
     
     logger.info(
-        f"Completed all {iterations_per_file} iterations for {model} in {file_name}. "
-        f"Total processing time: {hours:02d}:{minutes:02d}:{seconds:02d}"
+        "Completed batch for %s across %s files. Total processing time: %02d:%02d:%02d",
+        model, len(prompts), hours, minutes, seconds
     )
-
+    return row_counts
@@ -0,0 +1,51 @@
+"""On-disk response cache for LLM calls.
+
+Disabled unless LLM_CACHE=1. The study samples each prompt iterations_per_file
+times on purpose, so caching is only meant for development and test re-runs.
+"""
+import os
+import logging
+import functools
+import diskcache
+
+from utils import prompt_fingerprint
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE') == '1'
+
+_cache = None
+
+
+def get_cache() -> diskcache.Cache:
+    """Open the cache under OUTPUT_DIR on first use."""
+    global _cache
+    if _cache is None:
+        _cache = diskcache.Cache(os.path.join(os.getenv('OUTPUT_DIR', '.'), '.llm_cache'))
+    return _cache
+
+
+def cache_key(model: str, prompt: str) -> str:
+    """Build the cache key for a (model, instructions, prompt) combination."""
+    return prompt_fingerprint(prompt, model)
+
+
+def cached_llm(func):
+    """Cache an async ``func(prompt, model) -> str`` API call when LLM_CACHE=1."""
+    if not LLM_CACHE_ENABLED:
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(prompt: str, model: str) -> str:
+        key = cache_key(model, prompt)
+        cache = get_cache()
+        result = cache.get(key)
+        if result is not None:
+            logger.debug("LLM cache hit for model %s", model)
+            return result
+        result = await func(prompt, model)
+        if result is not None:
+            cache.set(key, result)
+        return result
+
+    return wrapper
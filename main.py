@@ -1,12 +1,17 @@
 """Main entry point."""
 import os
 import sys
+import asyncio
+import argparse
 import logging
-import concurrent.futures
+import threading
 
 from config import OPENAI_MODELS_MAIN, CLAUDE_MODELS, MISTRAL_MODELS, CONFIG
-from prompts import GLOBAL_PROMPT_TEMPLATE
-from file_processor import process_file
+from file_processor import (
+    process_file, process_openai_batch, drain_writes, result_queue,
+    mark_task_done, load_done, check_writer, results_csv_path, load_written_iterations
+)
+from utils import process_txt_files_and_attach_to_prompt
 
 log_dir = os.getenv('OUTPUT_DIR', '.')
 logging.basicConfig(
@@ -19,13 +24,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# HTTP client libraries log every request at INFO/DEBUG, which floods llm_processing.log
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("openai._base_client").setLevel(logging.WARNING)
+
+
+async def run_tasks(tasks, batch_jobs=()):
+    """Run all tasks concurrently, capping in-flight requests per provider.
+    
+    ``batch_jobs`` are per-model OpenAI Batch API jobs that run alongside the tasks.
+    """
+    semaphores = {
+        provider: asyncio.Semaphore(limit)
+        for provider, limit in CONFIG['provider_concurrency'].items()
+    }
+
+    async def execute_task(task):
+        """Execute a single processing task."""
+        try:
+            logger.info("Starting task: %s with %s (%s)", task['file_name'], task['model'], task['provider'])
+            rows = await process_file(
+                task['file_name'],
+                task['model'],
+                task['prompt'],
+                task['output_directory'],
+                semaphores[task['provider']],
+                task['done_iterations']
+            )
+            # Only checkpoint complete tasks; the missing iterations re-run on the next start
+            if rows < CONFIG['iterations_per_file']:
+                logger.warning("Task %s with %s has %s/%s rows; not marked done", task['file_name'], task['model'], rows, CONFIG['iterations_per_file'])
+                return False
+            mark_task_done(task['file_name'], task['model'])
+            logger.info("Completed task: %s with %s (%s)", task['file_name'], task['model'], task['provider'])
+            return True
+        except Exception as e:
+            logger.error("Error processing task %s with %s: %s", task['file_name'], task['model'], e, exc_info=True)
+            return False
+
+    async def execute_batch_job(job):
+        """Execute a single OpenAI Batch API job."""
+        try:
+            logger.info("Starting batch job: %s over %s files", job['model'], len(job['prompts']))
+            row_counts = await process_openai_batch(
+                job['prompts'],
+                job['model'],
+                job['output_directory'],
+                job['done_iterations']
+            )
+            complete = True
+            for file_name in job['prompts']:
+                rows = row_counts.get(file_name, 0)
+                if rows < CONFIG['iterations_per_file']:
+                    logger.warning("Batch file %s with %s has %s/%s rows; not marked done", file_name, job['model'], rows, CONFIG['iterations_per_file'])
+                    complete = False
+                    continue
+                mark_task_done(file_name, job['model'])
+            logger.info("Completed batch job: %s", job['model'])
+            return complete
+        except Exception as e:
+            logger.error("Error processing batch job for %s: %s", job['model'], e, exc_info=True)
+            return False
+
+    completed = 0
+    failed = 0
+    total = len(tasks) + len(batch_jobs)
+    coros = [execute_task(task) for task in tasks] + [execute_batch_job(job) for job in batch_jobs]
+
+    for future in asyncio.as_completed(coros):
+        # Stop paying for API calls whose results could no longer be written
+        check_writer()
+        if await future:
+            completed += 1
+        else:
+            failed += 1
+
+        logger.info("Progress: %s/%s tasks completed (%s successful, %s failed)", completed + failed, total, completed, failed)
+
+    return completed, failed
+
 
 def main():
     """Orchestrate resume processing with LLM models."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch-mode', action='store_true',
+                        help='Send OpenAI requests through the Batch API instead of synchronous calls')
+    args = parser.parse_args()
+
     logger.info("Starting processing...")
-    logger.info(f"OpenAI models to process: {OPENAI_MODELS_MAIN}")
-    logger.info(f"Claude models to process: {CLAUDE_MODELS}")
-    logger.info(f"Mistral models to process: {MISTRAL_MODELS}")
+    logger.info("OpenAI models to process: %s", OPENAI_MODELS_MAIN)
+    logger.info("Claude models to process: %s", CLAUDE_MODELS)
+    logger.info("Mistral models to process: %s", MISTRAL_MODELS)
 
     # Use OUTPUT_DIR env var for cloud, or local directories
     output_base = os.getenv('OUTPUT_DIR', '.')
@@ -40,13 +129,19 @@ def main():
     directory = 'resumes/md_extracted'
     files = os.listdir(directory)
 
+    # Read each resume and build its prompt once; every model and iteration reuses it
+    prompts = {
+        file_name: process_txt_files_and_attach_to_prompt(os.path.join(directory, file_name))
+        for file_name in files
+    }
+
     tasks = []
     for file_name in files:
         for i, model in enumerate(OPENAI_MODELS_MAIN):
             tasks.append({
                 'file_name': file_name,
                 'model': model,
-                'directory': directory,
+                'prompt': prompts[file_name],
                 'output_directory': openai_output_directory,
                 'provider': 'openai',
                 'group': i % 3
@@ -56,7 +151,7 @@ def main():
             tasks.append({
                 'file_name': file_name,
                 'model': model,
-                'directory': directory,
+                'prompt': prompts[file_name],
                 'output_directory': anthropic_output_directory,
                 'provider': 'anthropic',
                 'group': 0
@@ -66,59 +161,72 @@ def main():
             tasks.append({
                 'file_name': file_name,
                 'model': model,
-                'directory': directory,
+                'prompt': prompts[file_name],
                 'output_directory': mistral_output_directory,
                 'provider': 'mistral',
                 'group': 0
             })
     
-    logger.info(f"Created {len(tasks)} tasks for processing")
+    logger.info("Created %s tasks for processing", len(tasks))
+    
+    # Skip (file, model) pairs finished by an earlier run
+    done_path = os.path.join(output_base, 'done.jsonl')
+    done = load_done(done_path)
+    if done:
+        total_tasks = len(tasks)
+        tasks = [task for task in tasks if (task['file_name'], task['model']) not in done]
+        logger.info("Skipping %s tasks already recorded in %s, %s remaining", total_tasks - len(tasks), done_path, len(tasks))
     
     if not tasks:
         logger.warning("No tasks to process. Exiting.")
         return
     
-    logger.info(f"Starting execution of {len(tasks)} tasks with max_workers={CONFIG['max_workers']}")
+    # Resume unfinished tasks from the rows earlier runs already wrote, so only
+    # missing iterations are requested (and paid for) again
+    written_by_csv = {}
+    resumed = 0
+    for task in tasks:
+        csv_path = results_csv_path(task['file_name'], task['output_directory'])
+        if csv_path not in written_by_csv:
+            written_by_csv[csv_path] = load_written_iterations(csv_path)
+        task['done_iterations'] = written_by_csv[csv_path].get(task['model'], set())
+        resumed += len(task['done_iterations'])
+    if resumed:
+        logger.info("Resuming with %s iterations already written to the result CSVs", resumed)
     
-    def execute_task(task):
-        """Execute a single processing task."""
-        try:
-            logger.info(f"Starting task: {task['file_name']} with {task['model']} ({task['provider']})")
-            process_file(
-                task['file_name'],
-                task['model'],
-                task['directory'],
-                task['output_directory'],
-                GLOBAL_PROMPT_TEMPLATE
-            )
-            logger.info(f"Completed task: {task['file_name']} with {task['model']} ({task['provider']})")
-            return True
-        except Exception as e:
-            logger.error(f"Error processing task {task['file_name']} with {task['model']}: {e}", exc_info=True)
-            return False
+    batch_jobs = []
+    if args.batch_mode:
+        for model in OPENAI_MODELS_MAIN:
+            pending_prompts = {
+                task['file_name']: task['prompt']
+                for task in tasks if task['model'] == model
+            }
+            if pending_prompts:
+                batch_jobs.append({
+                    'prompts': pending_prompts,
+                    'model': model,
+                    'output_directory': openai_output_directory,
+                    'done_iterations': {
+                        task['file_name']: task['done_iterations']
+                        for task in tasks if task['model'] == model
+                    }
+                })
+        tasks = [task for task in tasks if task['provider'] != 'openai']
+        logger.info("Batch mode: %s OpenAI models moved to the Batch API", len(batch_jobs))
     
-    # Execute tasks in parallel using ThreadPoolExecutor
-    with concurrent.futures.ThreadPoolExecutor(max_workers=CONFIG['max_workers']) as executor:
-        futures = {executor.submit(execute_task, task): task for task in tasks}
-        
-        completed = 0
-        failed = 0
-        
-        for future in concurrent.futures.as_completed(futures):
-            task = futures[future]
-            try:
-                success = future.result()
-                if success:
-                    completed += 1
-                else:
-                    failed += 1
-            except Exception as e:
-                logger.error(f"Unexpected error in task {task['file_name']} with {task['model']}: {e}", exc_info=True)
-                failed += 1
-            
-            logger.info(f"Progress: {completed + failed}/{len(tasks)} tasks completed ({completed} successful, {failed} failed)")
+    logger.info("Starting execution of %s tasks with provider_concurrency=%s", len(tasks), CONFIG['provider_concurrency'])
+    
+    # A single writer thread owns the output CSVs so API workers never wait on disk
+    writer_thread = threading.Thread(target=drain_writes, args=(result_queue, done_path), daemon=True)
+    writer_thread.start()
+    try:
+        completed, failed = asyncio.run(run_tasks(tasks, batch_jobs))
+    finally:
+        result_queue.put(None)
+        writer_thread.join()
+    check_writer()
     
-    logger.info(f"All tasks completed. Successful: {completed}, Failed: {failed}, Total: {len(tasks)}")
+    logger.info("All tasks completed. Successful: %s, Failed: %s, Total: %s", completed, failed, completed + failed)
 
 
 if __name__ == "__main__":
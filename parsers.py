@@ -1,12 +1,99 @@
 """Parsing utilities for LLM responses."""
-import json
 import re
 import logging
+import functools
 from typing import List
+import orjson
 from config import CONFIG, QUESTION_RANGES
 
 logger = logging.getLogger(__name__)
 
+# Patterns used on every response, compiled once
+_QPREFIX = re.compile(r'^[Qq]\d+[:\-\.]?\s*')
+_NUMPREFIX = re.compile(r'^\d+[\.\)]\s*')
+_DIGIT17 = re.compile(r'\b([1-7])\b')
+_YES_NO = re.compile(r'\b(YES|NO)\b')
+_TRAIL_YN = re.compile(r'\s+(YES|NO)\s*$', re.IGNORECASE)
+_SECTIONS = re.compile(r'\n\s*---\s*\n|\n\s*\n\s*\n')
+
+THOUGHT_MARKERS = [
+    '19.',
+    'q19',
+    'thought process',
+    'explain your thought',
+    'step-by-step',
+    'reasoning'
+]
+
+
+@functools.lru_cache(maxsize=1)
+def load_json(response: str):
+    """Decode a response as JSON, or return None if it is not valid JSON.
+    
+    Cached so the parsers below decode each response only once between them.
+    Callers must not mutate the returned object.
+    """
+    try:
+        return orjson.loads(response)
+    except orjson.JSONDecodeError:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def scan_text(response: str) -> dict:
+    """Collect everything the plain-text fallbacks need in one pass over the response lines.
+    
+    Cached like load_json so the three parsers share one scan. Keys:
+    - lines: the response split on newlines
+    - line_scores: first 1-7 digit of each non-empty line after Q/number prefixes are removed
+    - all_digits: every standalone 1-7 digit in the response, in order
+    - has_yes / has_no: whether YES / NO appears as a word (case-insensitive)
+    - marker_line: index of the first line mentioning a thought process marker, or -1
+    """
+    lines = response.split('\n')
+    line_scores = []
+    all_digits = []
+    yes_no = set()
+    marker_line = -1
+    
+    for i, raw_line in enumerate(lines):
+        all_digits.extend(int(x) for x in _DIGIT17.findall(raw_line))
+        yes_no.update(_YES_NO.findall(raw_line.upper()))
+        if marker_line < 0:
+            line_lower = raw_line.lower()
+            if any(marker in line_lower for marker in THOUGHT_MARKERS):
+                marker_line = i
+        
+        line = raw_line.strip()
+        if not line:
+            continue
+        line = _QPREFIX.sub('', line)
+        line = _NUMPREFIX.sub('', line)
+        match = _DIGIT17.search(line)
+        if match:
+            line_scores.append(int(match.group(1)))
+    
+    return {
+        'lines': lines,
+        'line_scores': line_scores,
+        'all_digits': all_digits,
+        'has_yes': 'YES' in yes_no,
+        'has_no': 'NO' in yes_no,
+        'marker_line': marker_line
+    }
+
+
+def parse_response(response: str) -> dict:
+    """Parse scores, manipulation check and thought process from a response.
+    
+    Raises ValueError if the scores cannot be extracted.
+    """
+    return {
+        'scores': parse_scores(response),
+        'manipulation_check': parse_manipulation_check(response),
+        'thought_process': parse_thought_process(response)
+    }
+
 
 def parse_scores(scores: str) -> List[int]:
     """Parse scores from model response."""
@@ -14,19 +101,12 @@ def parse_scores(scores: str) -> List[int]:
         raise ValueError("Empty response from model")
     
     try:
-        data = json.loads(scores)
+        data = load_json(scores)
         if isinstance(data, dict):
             # Check for Mistral-style individual q1-q17 properties
-            if 'q1' in data and 'q17' in data:
-                numbers = []
-                for i in range(1, CONFIG['num_questions'] + 1):
-                    key = f'q{i}'
-                    if key in data:
-                        numbers.append(int(data[key]))
-                    else:
-                        break
-                if len(numbers) == CONFIG['num_questions']:
-                    return numbers
+            question_keys = [f'q{i}' for i in range(1, CONFIG['num_questions'] + 1)]
+            if all(key in data for key in question_keys):
+                return [int(data[key]) for key in question_keys]
             
             if 'scores' in data:
                 numbers = [int(x) for x in data['scores']]
@@ -65,36 +145,23 @@ def parse_scores(scores: str) -> List[int]:
             numbers = [int(x) for x in data]
             if len(numbers) == CONFIG['num_questions']:
                 return numbers
-    except (json.JSONDecodeError, ValueError, KeyError, TypeError):
+    except (ValueError, KeyError, TypeError):
         pass
     
-    numbers = []
-    lines = scores.strip().split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        line = re.sub(r'^[Qq]\d+[:\-\.]?\s*', '', line)
-        line = re.sub(r'^\d+[\.\)]\s*', '', line)
-        
-        match = re.search(r'\b([1-7])\b', line)
-        if match:
-            num = int(match.group(1))
-            numbers.append(num)
+    scan = scan_text(scores)
+    numbers = scan['line_scores']
     
     if len(numbers) == CONFIG['num_questions']:
-        return numbers
+        return list(numbers)
     
     if len(numbers) > CONFIG['num_questions']:
-        logger.warning(f"Found {len(numbers)} numbers, expected {CONFIG['num_questions']}, taking first {CONFIG['num_questions']}")
+        logger.warning("Found %s numbers, expected %s, taking first %s", len(numbers), CONFIG['num_questions'], CONFIG['num_questions'])
         return numbers[:CONFIG['num_questions']]
     
     if len(numbers) < CONFIG['num_questions']:
-        all_numbers = re.findall(r'\b([1-7])\b', scores)
+        all_numbers = scan['all_digits']
         if len(all_numbers) >= CONFIG['num_questions']:
-            return [int(x) for x in all_numbers[:CONFIG['num_questions']]]
+            return all_numbers[:CONFIG['num_questions']]
     
     raise ValueError(f"Could not extract {CONFIG['num_questions']} valid scores. Found {len(numbers)} numbers: {numbers}")
 
@@ -117,7 +184,7 @@ def validate_scores(score_list: List[int]) -> List[int]:
 def parse_manipulation_check(response: str) -> str:
     """Parse manipulation check (YES/NO) from response."""
     try:
-        data = json.loads(response)
+        data = load_json(response)
         if isinstance(data, dict):
             # Direct field
             if 'manipulation_check' in data:
@@ -140,26 +207,17 @@ def parse_manipulation_check(response: str) -> str:
                             value = str(v).upper()
                             if value in ['YES', 'NO']:
                                 return value
-    except (json.JSONDecodeError, KeyError, TypeError):
+    except (KeyError, TypeError):
         pass
     
-    response_upper = response.upper()
+    scan = scan_text(response)
     
-    if re.search(r'\bYES\b', response_upper):
+    # A YES anywhere wins over a NO, matching a scan of the whole response
+    if scan['has_yes']:
         return "YES"
-    elif re.search(r'\bNO\b', response_upper):
+    elif scan['has_no']:
         return "NO"
     
-    lines = response.split('\n')
-    for i, line in enumerate(lines):
-        line_upper = line.upper()
-        if 'MANIPULATION' in line_upper or 'Q18' in line_upper or '18.' in line:
-            for j in range(i, min(i + 5, len(lines))):
-                if re.search(r'\bYES\b', lines[j].upper()):
-                    return "YES"
-                elif re.search(r'\bNO\b', lines[j].upper()):
-                    return "NO"
-    
     logger.warning("Could not find YES/NO for manipulation check, defaulting to UNKNOWN")
     return "UNKNOWN"
 
@@ -167,7 +225,7 @@ def parse_manipulation_check(response: str) -> str:
 def parse_thought_process(response: str) -> str:
     """Extract thought process from response."""
     try:
-        data = json.loads(response)
+        data = load_json(response)
         if isinstance(data, dict):
             # Direct field
             if 'thought_process' in data:
@@ -206,41 +264,23 @@ def parse_thought_process(response: str) -> str:
                         result = extract_text(tp)
                         if result:
                             return result
-    except (json.JSONDecodeError, KeyError, TypeError):
+    except (KeyError, TypeError):
         pass
     
-    response_lower = response.lower()
-    
-    markers = [
-        '19.',
-        'q19',
-        'thought process',
-        'explain your thought',
-        'step-by-step',
-        'reasoning'
-    ]
-    
-    lines = response.split('\n')
-    start_idx = -1
-    
-    for i, line in enumerate(lines):
-        line_lower = line.lower()
-        if any(marker in line_lower for marker in markers):
-            start_idx = i + 1
-            break
+    scan = scan_text(response)
     
-    if start_idx > 0:
-        thought_text = '\n'.join(lines[start_idx:]).strip()
-        thought_text = re.sub(r'\s+(YES|NO)\s*$', '', thought_text, flags=re.IGNORECASE)
+    if scan['marker_line'] >= 0:
+        thought_text = '\n'.join(scan['lines'][scan['marker_line'] + 1:]).strip()
+        thought_text = _TRAIL_YN.sub('', thought_text)
         if thought_text:
             return thought_text
     
-    sections = re.split(r'\n\s*---\s*\n|\n\s*\n\s*\n', response)
+    sections = _SECTIONS.split(response)
     if len(sections) > 1:
         for section in reversed(sections):
             section = section.strip()
             if len(section) > 100:
-                section = re.sub(r'\s+(YES|NO)\s*$', '', section, flags=re.IGNORECASE)
+                section = _TRAIL_YN.sub('', section)
                 return section
     
     logger.warning("Could not extract thought process, returning empty string")
@@ -1,92 +1,177 @@
-import PyPDF2
 import os
-import pdfplumber
-import pytesseract
+import hashlib
+import multiprocessing
+import threading
 
-def split_pdf(input_pdf_path, output_pdf_paths, page_groups):
-    with open(input_pdf_path, 'rb') as input_pdf_file:
-        reader = PyPDF2.PdfReader(input_pdf_file)
-        
-        for output_pdf_path in output_pdf_paths:
-            os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
+# Must be set before libtesseract loads OpenMP: OCR already runs one page per
+# thread, so each tesseract instance should stay single-threaded
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+import fitz
+import tesserocr
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+_IO_BUFFER = 1 << 16
+
+def _split_one(args):
+    input_pdf_path, output_pdf_path, pages = args
+    with open(input_pdf_path, 'rb', buffering=_IO_BUFFER) as input_pdf_file:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(input_pdf_file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        reader = PdfReader(input_pdf_file)
+        writer = PdfWriter()
         
-        for output_pdf_path, pages in zip(output_pdf_paths, page_groups):
-            writer = PyPDF2.PdfWriter()
-            
-            for page_num in pages:
-                try:
-                    writer.add_page(reader.pages[page_num - 1])
-                except IndexError:
-                    print(f"Page number {page_num} is out of range for {input_pdf_path}")
-                    continue
-            
+        for page_num in pages:
             try:
-                with open(output_pdf_path, 'wb') as output_pdf_file:
-                    writer.write(output_pdf_file)
-            except Exception as e:
-                print(f"Failed to write {output_pdf_path}: {e}")
+                writer.add_page(reader.pages[page_num - 1])
+            except IndexError:
+                print(f"Page number {page_num} is out of range for {input_pdf_path}")
+                continue
+        
+        try:
+            with open(output_pdf_path, 'wb', buffering=_IO_BUFFER) as output_pdf_file:
+                writer.write(output_pdf_file)
+        except Exception as e:
+            print(f"Failed to write {output_pdf_path}: {e}")
 
-def process_pdf_files(pdf_dir, txt_dir):
-    os.makedirs(txt_dir, exist_ok=True)
+def split_pdf(input_pdf_path, jobs):
+    for output_pdf_path, _ in jobs:
+        os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
+
+    if not jobs:
+        return
+
+    # Each output is written independently; readers are opened per worker since
+    # pypdf objects do not pickle
+    with multiprocessing.Pool(min(len(jobs), os.cpu_count() or 1)) as pool:
+        pool.map(_split_one, [(input_pdf_path, output_pdf_path, pages) for output_pdf_path, pages in jobs])
+
+_tess = threading.local()
+_ocr_executor = None
+_ocr_cache_dir = ".ocr_cache"
+_NO_TEXT_PLACEHOLDER = "This page may contain images or non-standard text encoding."
+
+# 150 DPI grayscale is plenty for printed resume text; LSTM-only engine and a
+# single-block page layout skip the legacy engine and layout analysis
+_OCR_DPI = 150
+_OCR_OEM = tesserocr.OEM.LSTM_ONLY
+_OCR_PSM = tesserocr.PSM.SINGLE_BLOCK
+
+def _get_tess_api():
+    # PyTessBaseAPI is not thread-safe, so each OCR thread keeps its own; the
+    # language data is loaded once per thread instead of once per page
+    api = getattr(_tess, 'api', None)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang='eng', oem=_OCR_OEM, psm=_OCR_PSM)
+        _tess.api = api
+    return api
+
+def _get_ocr_executor():
+    # Created once so the per-thread APIs survive across calls
+    global _ocr_executor
+    if _ocr_executor is None:
+        _ocr_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _ocr_executor
 
-    pdf_files = [os.path.join(pdf_dir, f) for f in os.listdir(pdf_dir) if f.endswith('.pdf')]
-
-    for pdf_file in pdf_files:
-        with pdfplumber.open(pdf_file) as pdf:
-            all_text = []
-            for page_num, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                
-                if text:
-                    all_text.append(text)
-                else:
-                    image = page.to_image()
-                    ocr_text = pytesseract.image_to_string(image.original)
-                    if ocr_text.strip():
-                        all_text.append(ocr_text)
-                    else:
-                        all_text.append("This page may contain images or non-standard text encoding.")
-
-            txt_file_path = os.path.join(txt_dir, f"{os.path.splitext(os.path.basename(pdf_file))[0]}.txt")
-            with open(txt_file_path, 'w', encoding='utf-8') as txt_file:
-                txt_file.write("\n\n".join(all_text))
+def _ocr_cache_key(image):
+    # The split PDFs share source pages, so identical renders recur across files
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.mode}{image.size}{_OCR_OEM}{_OCR_PSM}".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+def _ocr_image(image):
+    key = _ocr_cache_key(image)
+    cache_path = os.path.join(_ocr_cache_dir, f"{key}.txt")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as cache_file:
+            ocr_text = cache_file.read()
+    else:
+        api = _get_tess_api()
+        api.SetImage(image)
+        ocr_text = api.GetUTF8Text()
+        os.makedirs(_ocr_cache_dir, exist_ok=True)
+        # Write then rename so concurrent workers never read a partial entry
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+            cache_file.write(ocr_text)
+        os.replace(tmp_path, cache_path)
+
+    if ocr_text.strip():
+        return ocr_text
+    return _NO_TEXT_PLACEHOLDER
+
+def _render_page(page):
+    pix = page.get_pixmap(dpi=_OCR_DPI, colorspace=fitz.csGRAY)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+def _extract_text(pdf, page_indices):
+    page_text = {}
+    scanned = []
+    for page_num in page_indices:
+        page = pdf[page_num]
+        text = page.get_text("text")
+        
+        if text.strip():
+            page_text[page_num] = text
+        elif not page.get_bboxlog():
+            # Nothing painted at all (images, inline images, paths), so OCR could only come back empty
+            page_text[page_num] = _NO_TEXT_PLACEHOLDER
+        else:
+            # PyMuPDF documents are not thread-safe; render here, OCR in threads
+            scanned.append((page_num, _render_page(page)))
+
+    if scanned:
+        executor = _get_ocr_executor()
+        futures = {executor.submit(_ocr_image, image): page_num for page_num, image in scanned}
+        for future in as_completed(futures):
+            page_text[futures[future]] = future.result()
+
+    return page_text
+
+def extract_pages_text(input_pdf_path, pages):
+    # pages are 1-based, matching JOBS
+    with fitz.open(input_pdf_path) as pdf:
+        valid = sorted(p for p in pages if 1 <= p <= pdf.page_count)
+        for page_num in sorted(set(pages) - set(valid)):
+            print(f"Page number {page_num} is out of range for {input_pdf_path}")
+        page_text = _extract_text(pdf, [p - 1 for p in valid])
+    return {p: page_text[p - 1] for p in valid}
+
+def write_group_texts(page_text, jobs, txt_dir):
+    os.makedirs(txt_dir, exist_ok=True)
+    for output_pdf_path, pages in jobs:
+        txt_file_path = os.path.join(txt_dir, f"{os.path.splitext(os.path.basename(output_pdf_path))[0]}.txt")
+        with open(txt_file_path, 'w', encoding='utf-8', buffering=_IO_BUFFER) as txt_file:
+            txt_file.write("\n\n".join(page_text[p] for p in pages if p in page_text))
 
 input_pdf_path = 'resumes/resume.pdf'
 
-output_pdf_paths = [
-    'resumes/resume_extracted/resume_1_4_5.pdf',
-    'resumes/resume_extracted/resume_6_9_10.pdf',
-    'resumes/resume_extracted/resume_1_3_4.pdf',
-    'resumes/resume_extracted/resume_6_9_8.pdf',
-    'resumes/resume_extracted/resume_1_2_5.pdf',
-    'resumes/resume_extracted/resume_6_7_10.pdf',
-    'resumes/resume_extracted/resume_1_2_3.pdf',
-    'resumes/resume_extracted/resume_6_7_8.pdf',
-    'resumes/resume_extracted/resume_1_2.pdf',
-    'resumes/resume_extracted/resume_6_7.pdf',
-    'resumes/resume_extracted/resume_1_3.pdf',
-    'resumes/resume_extracted/resume_6_8.pdf'
-]
-
-page_groups = [
-    [1, 4, 5],
-    [6, 9, 10],
-    [1, 3, 4],
-    [6, 9, 8],
-    [1, 2, 5],
-    [6, 7, 10],
-    [1, 2, 3],
-    [6, 7, 8],
-    [1, 2],
-    [6, 7],
-    [1, 3],
-    [6, 8]
-] 
+# (output PDF, source pages) for each resume variant
+JOBS = (
+    ('resumes/resume_extracted/resume_1_4_5.pdf', (1, 4, 5)),
+    ('resumes/resume_extracted/resume_6_9_10.pdf', (6, 9, 10)),
+    ('resumes/resume_extracted/resume_1_3_4.pdf', (1, 3, 4)),
+    ('resumes/resume_extracted/resume_6_9_8.pdf', (6, 9, 8)),
+    ('resumes/resume_extracted/resume_1_2_5.pdf', (1, 2, 5)),
+    ('resumes/resume_extracted/resume_6_7_10.pdf', (6, 7, 10)),
+    ('resumes/resume_extracted/resume_1_2_3.pdf', (1, 2, 3)),
+    ('resumes/resume_extracted/resume_6_7_8.pdf', (6, 7, 8)),
+    ('resumes/resume_extracted/resume_1_2.pdf', (1, 2)),
+    ('resumes/resume_extracted/resume_6_7.pdf', (6, 7)),
+    ('resumes/resume_extracted/resume_1_3.pdf', (1, 3)),
+    ('resumes/resume_extracted/resume_6_8.pdf', (6, 8)),
+)
+
 def main():
-    split_pdf(input_pdf_path, output_pdf_paths, page_groups)
-    pdf_dir = "resumes/resume_extracted"
+    # The split PDFs are kept as artifacts; the text is built from the source PDF
+    split_pdf(input_pdf_path, JOBS)
     txt_dir = "resumes/md_extracted"
-    process_pdf_files(pdf_dir, txt_dir)
+    unique_pages = set(p for _, pages in JOBS for p in pages)
+    page_text = extract_pages_text(input_pdf_path, unique_pages)
+    write_group_texts(page_text, JOBS, txt_dir)
 
 if __name__ == "__main__":
     main()